@@ -4,6 +4,7 @@ from sphinx.util import logging
 from sphinx.util.docutils import SphinxDirective
 
 from .node import SEORedirectNode
+from .util import verbose_enabled
 
 """
 Directive usage example:
@@ -15,20 +16,24 @@ Directive usage example:
   ...
 """
 
+# Sphinx logger
+logger = logging.getLogger(__name__)
+
 
 class SEORedirectDirective(SphinxDirective):
     has_content = True
     optional_arguments = 1
-    logger = logging.getLogger("SEORedirectDirective")
 
     def run(self) -> List[nodes.Node]:
-        redirects: List[str] = list()
-        # If there was an argument, split it on commas and add to the redirects list
-        if len(self.arguments) == 1:
-            redirects.extend(self.arguments[0].split(","))
-        # If there is content, each line is a redirect
-        for line in self.content:
-            if line != "":
-                redirects.append(line)
-        self.logger.verbose("run(): collected %d redirects" % len(redirects))
-        return [SEORedirectNode(redirects)]
+        # If there was an argument, split it on commas to start the redirects list
+        redirects: List[str] = (
+            self.arguments[0].split(",") if self.arguments else list()
+        )
+        # If there is content, each line is a redirect; empty lines are dropped by SEORedirectNode
+        redirects.extend(self.content)
+        redirect_node = SEORedirectNode(redirects)
+        if verbose_enabled(self.env.app):
+            logger.verbose(
+                "run(): collected %d redirects", len(redirect_node.redirect_list)
+            )
+        return [redirect_node]
@@ -1,16 +1,14 @@
 from typing import List
 from docutils import nodes
-from sphinx.util import logging
 
 
 class SEORedirectNode(nodes.Element):
-    logger: logging.SphinxLoggerAdapter
     _redirect_list: List[str]
 
     def __init__(self, redirects: List[str]):
         super().__init__()
-        self.logger = logging.getLogger("SEORedirectNode")
-        self._redirect_list = redirects.copy()
+        # the comprehension builds a new list, so the caller's list is not shared
+        self._redirect_list = [redirect for redirect in redirects if redirect]
 
     def astext(self) -> str:
         return ",".join(self.redirect_list)
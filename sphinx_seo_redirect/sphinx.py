@@ -1,13 +1,17 @@
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
 from docutils import nodes
-from pathlib import Path
 from shutil import copyfile
+from time import monotonic
 from sphinx.application import Sphinx
 from sphinx.environment import BuildEnvironment
 from sphinx.util import logging
 from sphinx.util.console import bold, colorize, term_width_line  # type: ignore
-from typing import Dict, Mapping, Tuple, Any, List
+from typing import Dict, Iterable, Iterator, Mapping, Tuple, Any, List, Set
 
-from .walker import DoctreeWalker
+from .util import debug_enabled, verbose_enabled
+from .walker import collect_redirects
 
 # Global Sphinx configuration options
 CONFIG_HTML_BASEURL = "html_baseurl"
@@ -31,6 +35,8 @@ CTX_HAS_FRAGMENT_REDIRECTS = "has_fragment_redirects"
 CTX_FRAGMENT_REDIRECTS = "fragment_redirects"
 # Other constants...
 DEFAULT_PAGE = "-"
+# Minimum number of seconds between redraws of a status line when the percentage has not changed
+STATUS_UPDATE_INTERVAL = 0.05
 
 # Sphinx logger
 logger = logging.getLogger(__name__)
@@ -46,19 +52,16 @@ def env_purge_doc(app: Sphinx, env: BuildEnvironment, docname: str) -> None:
     Purge an existing document from the pickled document list.
     This function is called when the Sphinx `env-purge-doc` event is fired.
 
-    :param app: The Sphinx instance; unused
+    :param app: The Sphinx instance
     :param env: The Sphinx BuildEnvironment
     :param docname: The name of the document to purge
     """
-    if hasattr(env, ENV_DOCTREE_REDIRECTS):
-        doctree_redirects: Dict[str, Dict[str, List[str]]] = getattr(
-            env, ENV_DOCTREE_REDIRECTS
-        )
-        if docname in doctree_redirects:
-            logger.verbose(
-                "env_purge_doc: redirects contains %s; removing it" % docname
-            )
-            doctree_redirects.pop(docname)
+    # builder_inited has already added the redirect attributes to the environment
+    doctree_redirects: Dict[str, Dict[str, List[str]]] = getattr(
+        env, ENV_DOCTREE_REDIRECTS
+    )
+    if doctree_redirects.pop(docname, None) is not None and verbose_enabled(app):
+        logger.verbose("env_purge_doc: removed redirects for %s", docname)
 
 
 def env_merge_info(
@@ -73,16 +76,25 @@ def env_merge_info(
     :param docnames: A list of the document names to merge
     :param other: The Sphinx BuildEnvironment from the reader worker
     """
-    # Add any links that were present in the reader worker's environment
-    if hasattr(other, ENV_DOCTREE_REDIRECTS):
+    # Add any links that were present in the reader worker's environment. The worker's environment is a copy of
+    # the master environment, so builder_inited has already added the redirect attributes to both.
+    other_redirects: Dict[str, Dict[str, List[str]]] = getattr(
+        other, ENV_DOCTREE_REDIRECTS
+    )
+    if other_redirects:
         doctree_redirects: Dict[str, Dict[str, List[str]]] = getattr(
             env, ENV_DOCTREE_REDIRECTS
         )
-        other_redirects: Dict[str, Dict[str, List[str]]] = getattr(
-            other, ENV_DOCTREE_REDIRECTS
-        )
-        for doc in docnames:
-            doctree_redirects[doc] = other_redirects[doc]
+        if not doctree_redirects:
+            # the worker's environment was copied from the master one, so when the master has no redirects every
+            # redirect in the worker's came from the documents it read; merge them in bulk
+            doctree_redirects.update(other_redirects)
+        else:
+            # most documents have no redirects, so look each one up once rather than testing membership first
+            for doc in docnames:
+                section_redirects = other_redirects.get(doc)
+                if section_redirects is not None:
+                    doctree_redirects[doc] = section_redirects
 
 
 def env_updated(app: Sphinx, env: BuildEnvironment) -> List[str]:
@@ -91,21 +103,19 @@ def env_updated(app: Sphinx, env: BuildEnvironment) -> List[str]:
     # get the list of redirects from the config
     redirects_option: Dict[str, str] = getattr(app.config, CONFIG_OPTION_REDIRECTS)
     # overlay redirects from config onto redirects from doctree
-    for key in redirects_option:
-        computed_doctree_redirects[key] = redirects_option[key]
+    computed_doctree_redirects.update(redirects_option)
     # compute the final set of redirects
     computed_redirects: Dict[str, Dict[str, str]] = compute_redirects(
         app, computed_doctree_redirects
     )
     setattr(app.env, ENV_COMPUTED_REDIRECTS, computed_redirects)
     # determine which pages contain intra_page_fragments
-    intra_page_fragments: List[str] = list()
-    for page in computed_redirects.keys():
-        if page in env.all_docs:
-            intra_page_fragments.append(page)
-    logger.verbose(
-        "env_updated(): found %d intra-page fragment pages" % len(intra_page_fragments)
-    )
+    intra_page_fragments: Set[str] = computed_redirects.keys() & env.all_docs.keys()
+    if verbose_enabled(app):
+        logger.verbose(
+            "env_updated(): found %d intra-page fragment pages",
+            len(intra_page_fragments),
+        )
     setattr(app.env, ENV_INTRA_PAGE_FRAGMENT_PAGES, intra_page_fragments)
     return list()
 
@@ -114,90 +124,91 @@ def html_page_context(
     app: Sphinx, pagename: str, templatename: str, context: Dict, doctree: Dict
 ) -> str:
     context[CTX_HAS_FRAGMENT_REDIRECTS] = False
-    intra_page_fragments: List[str] = getattr(app.env, ENV_INTRA_PAGE_FRAGMENT_PAGES)
+    env = app.env
+    intra_page_fragments: Set[str] = getattr(env, ENV_INTRA_PAGE_FRAGMENT_PAGES)
     if pagename in intra_page_fragments:
-        logger.verbose(
-            "html_page_context(): page %s has intra-page redirects; adding redirects to HTML context"
-            % pagename
-        )
+        if verbose_enabled(app):
+            logger.verbose(
+                "html_page_context(): page %s has intra-page redirects; adding redirects to HTML context",
+                pagename,
+            )
         computed_redirects: Dict[str, Dict[str, str]] = getattr(
-            app.env, ENV_COMPUTED_REDIRECTS
+            env, ENV_COMPUTED_REDIRECTS
         )
         context[CTX_FRAGMENT_REDIRECTS] = build_js_object(computed_redirects[pagename])
         context[CTX_HAS_FRAGMENT_REDIRECTS] = True
     return templatename
 
 
-def html_collect_pages(app: Sphinx) -> List[Tuple[str, Dict[str, Any], str]]:
+def html_collect_pages(app: Sphinx) -> Iterator[Tuple[str, Dict[str, Any], str]]:
     """
-    Collect the redirect page information and generate a list of redirect pages to write.
+    Collect the redirect page information and generate the redirect pages to write.
 
     :param app: The Sphinx Application instance
-    :return: The list of redirect pages to create
+    :return: An iterator of the redirect pages to create
     """
-    redirect_pages: List[Tuple[str, Dict[str, Any], str]] = list()
     extensionless_pages: List[str] = list()
+    verbose: bool = verbose_enabled(app)
+    debug: bool = debug_enabled(app)
     write_extensionless_pages: bool = getattr(
         app.config, CONFIG_WRITE_EXTENSIONLESS_PAGES
     )
     computed_redirects: Dict[str, Dict[str, str]] = getattr(
         app.env, ENV_COMPUTED_REDIRECTS
     )
-    for page in computed_redirects.keys():
+    all_docs = app.env.all_docs
+    for page, page_redirects in computed_redirects.items():
         # if page is a real page in the doctree, we've already handled it elsewhere
-        if page in app.env.all_docs:
-            logger.verbose(
-                "html_collect_pages(): page %s has intra-page redirects; skipping it"
-                % page
-            )
+        if page in all_docs:
+            if verbose:
+                logger.verbose(
+                    "html_collect_pages(): page %s has intra-page redirects; skipping it",
+                    page,
+                )
             continue
         # Handle the case where there is a single redirect defined for a source page
-        if len(computed_redirects[page]) == 1:
+        if len(page_redirects) == 1:
             # if this page only has a redirect to the DEFAULT_PAGE, then use a simple redirect template
-            if DEFAULT_PAGE in computed_redirects[page]:
-                default_page = computed_redirects[page][DEFAULT_PAGE]
-                logger.verbose(
-                    "html_collect_pages(): simple redirect from %s to %s"
-                    % (page, default_page)
-                )
-                redirect_pages.append(
-                    (
+            default_page = page_redirects.get(DEFAULT_PAGE)
+            if default_page is not None:
+                if verbose:
+                    logger.verbose(
+                        "html_collect_pages(): simple redirect from %s to %s",
                         page,
-                        {"to_uri": default_page},
-                        "simpleredirect.html",  # TODO: move this into a config variable
+                        default_page,
                     )
+                yield (
+                    page,
+                    {"to_uri": default_page},
+                    "simpleredirect.html",  # TODO: move this into a config variable
                 )
                 if write_extensionless_pages:
                     extensionless_pages.append(page)
                 continue
             # there's only one fragment redirect, and it's not DEFAULT_PAGE. if someone browses to the page, they
             # will see a blank screen. we add a DEFAULT_PAGE redirect in that case.
-            default_page_url = ""
-            for frag in computed_redirects[page].keys():
-                default_page_url = computed_redirects[page][frag]
-                break
+            default_page_url = next(iter(page_redirects.values()), "")
             if default_page_url != "":
-                computed_redirects[page][DEFAULT_PAGE] = default_page_url
-                logger.debug(
-                    "html_collect_pages(): added DEFAULT_PAGE redirect for " + page
-                )
+                page_redirects[DEFAULT_PAGE] = default_page_url
+                if debug:
+                    logger.debug(
+                        "html_collect_pages(): added DEFAULT_PAGE redirect for %s", page
+                    )
         # build a JS object that will hold the fragment redirect map
-        jsobject = build_js_object(computed_redirects[page])
-        logger.verbose("html_collect_pages(): redirect from %s; %s" % (page, jsobject))
-        redirect_pages.append(
-            (
-                page,
-                {CTX_FRAGMENT_REDIRECTS: jsobject},
-                "redirect.html",  # TODO: move this into a config variable
-            )
+        jsobject = build_js_object(page_redirects)
+        if verbose:
+            logger.verbose("html_collect_pages(): redirect from %s; %s", page, jsobject)
+        yield (
+            page,
+            {CTX_FRAGMENT_REDIRECTS: jsobject},
+            "redirect.html",  # TODO: move this into a config variable
         )
         if write_extensionless_pages:
             extensionless_pages.append(page)
-    # if we're configured to write extensionless pages, save the list of pages to the environment for later processing
+    # if we're configured to write extensionless pages, save the list of pages to the environment for later
+    # processing. Sphinx consumes every page before build-finished fires, so the list is complete by then.
     if write_extensionless_pages:
         setattr(app.env, ENV_EXTENSIONLESS_PAGES, extensionless_pages)
-    # return the iterable of pages to write
-    return redirect_pages
 
 
 def doctree_resolved(app: Sphinx, doctree: nodes.document, docname: str) -> None:
@@ -208,14 +219,16 @@ def doctree_resolved(app: Sphinx, doctree: nodes.document, docname: str) -> None
     :param docname: The name of the document
     :return:
     """
-    doctree_walker = DoctreeWalker(doctree)
-    doctree.walk(doctree_walker)
-    if len(doctree_walker.section_redirects) == 0:
+    root_section, section_redirects = collect_redirects(doctree, debug_enabled(app))
+    if len(section_redirects) == 0:
         return
+    # redirects to the root section go to the page itself, which is stored as the DEFAULT_PAGE
+    if root_section in section_redirects:
+        section_redirects[DEFAULT_PAGE] = section_redirects.pop(root_section)
     doctree_redirects: Dict[str, Dict[str, List[str]]] = getattr(
         app.env, ENV_DOCTREE_REDIRECTS
     )
-    doctree_redirects[docname] = doctree_walker.section_redirects
+    doctree_redirects[docname] = section_redirects
 
 
 def build_finished(app: Sphinx, exception: Exception):
@@ -224,26 +237,55 @@ def build_finished(app: Sphinx, exception: Exception):
             app.config, CONFIG_WRITE_EXTENSIONLESS_PAGES
         )
         if write_extensionless_pages:
+            verbose: bool = verbose_enabled(app)
             extensionless_pages: List[str] = getattr(app.env, ENV_EXTENSIONLESS_PAGES)
-            for pagename in list_status_iterator(
-                extensionless_pages,
-                "writing extensionless redirect pages... ",
-                "darkgreen",
-                len(extensionless_pages),
-            ):
-                target_file = Path(app.outdir).joinpath(pagename)
-                if target_file.is_dir():
+            outdir = str(app.outdir)
+            # determine which pages can be written before starting any copies
+            pagenames: List[str] = list()
+            source_files: List[str] = list()
+            target_files: List[str] = list()
+            for pagename in extensionless_pages:
+                target_file = os.path.join(outdir, pagename)
+                if os.path.isdir(target_file):
                     logger.warning(
-                        "target extensionless redirect '%s' is a directory; cannot write this page"
-                        % target_file
+                        "target extensionless redirect '%s' is a directory; cannot write this page",
+                        target_file,
                     )
                     continue
-                source_file = str(target_file) + ".html"
-                logger.verbose(
-                    "build_finished(): extensionless redirect; %s -> %s"
-                    % (source_file, target_file)
-                )
-                copyfile(source_file, target_file)
+                source_file = target_file + ".html"
+                if verbose:
+                    logger.verbose(
+                        "build_finished(): extensionless redirect; %s -> %s",
+                        source_file,
+                        target_file,
+                    )
+                pagenames.append(pagename)
+                source_files.append(source_file)
+                target_files.append(target_file)
+            # the copies are independent of each other, so overlap their I/O in a thread pool
+            with ThreadPoolExecutor() as executor:
+                for _ in list_status_iterator(
+                    executor.map(
+                        copy_extensionless_page, pagenames, source_files, target_files
+                    ),
+                    "writing extensionless redirect pages... ",
+                    "darkgreen",
+                    len(pagenames),
+                ):
+                    pass
+
+
+def copy_extensionless_page(pagename: str, source_file: str, target_file: str) -> str:
+    """
+    Copy a redirect page to its extensionless location.
+
+    :param pagename: The name of the redirect page
+    :param source_file: The path of the redirect page HTML file
+    :param target_file: The path of the extensionless redirect page
+    :return: The name of the redirect page
+    """
+    copyfile(source_file, target_file)
+    return pagename
 
 
 def compute_doctree_redirects(app: Sphinx) -> Dict[str, str]:
@@ -258,16 +300,18 @@ def compute_doctree_redirects(app: Sphinx) -> Dict[str, str]:
     html_baseurl = html_baseurl.removesuffix("/")
     url_path_prefix: str = getattr(app.config, CONFIG_URL_PATH_PREFIX)
     url_path_prefix = url_path_prefix.removesuffix("/")
+    # the URL prefix is the same for every document, so normalize it once. an empty url_path_prefix must not add
+    # an empty path segment.
+    base_url = (
+        f"{html_baseurl}/{url_path_prefix}/" if url_path_prefix else f"{html_baseurl}/"
+    )
     # iterate through doctree_redirects and "invert" the data structure
-    for doc in doctree_redirects:
-        for section in doctree_redirects[doc]:
-            for old_doc in doctree_redirects[doc][section]:
-                computed_doctree_redirects[old_doc] = "%s/%s/%s#%s" % (
-                    html_baseurl,
-                    url_path_prefix,
-                    doc,
-                    section,
-                )
+    for doc, section_redirects in doctree_redirects.items():
+        doc_url = f"{base_url}{doc}"
+        for section, old_docs in section_redirects.items():
+            # the target URL is the same for every old document redirecting to this section
+            target_url = doc_url if section == DEFAULT_PAGE else f"{doc_url}#{section}"
+            computed_doctree_redirects.update(dict.fromkeys(old_docs, target_url))
     return computed_doctree_redirects
 
 
@@ -280,64 +324,51 @@ def compute_redirects(
     html_baseurl = html_baseurl.removesuffix("/")
     url_path_prefix: str = getattr(app.config, CONFIG_URL_PATH_PREFIX)
     url_path_prefix = url_path_prefix.removesuffix("/")
+    has_url_path_prefix = url_path_prefix != ""
     # process each record in the redirects dict
-    for source in redirects_option.keys():
-        # split the URL on # so we get the path and page name + the fragment, if any
-        tokens = source.split("#")
-        if len(tokens) == 2:
-            pagename = tokens[0].removesuffix(
-                ".html"
-            )  # ensure pagename does not end with ".html"
-            fragment = tokens[1].removesuffix(
-                ".html"
-            )  # if the fragment ends in ".html", remove it
-        elif len(tokens) == 1:
-            pagename = tokens[0].removesuffix(
-                ".html"
-            )  # ensure pagename does not end with ".html"
-            fragment = ""
-        else:
-            logger.warning("compute_redirects(): invalid redirect: %s" % source)
-            continue
+    for source, source_target in redirects_option.items():
+        # split the URL on the first # so we get the path and page name + the fragment, if any
+        pagename, separator, fragment = source.partition("#")
+        if separator:
+            # a fragment cannot contain another #
+            if "#" in fragment:
+                logger.warning("compute_redirects(): invalid redirect: %s", source)
+                continue
+            # if the fragment ends in ".html", remove it
+            fragment = fragment.removesuffix(".html")
+        # ensure pagename does not end with ".html"
+        pagename = pagename.removesuffix(".html")
         # if the source page is the empty string then the redirect is invalid. warn the user and continue on.
         if pagename == "":
-            logger.warning("compute_redirects(): empty page name: %s" % source)
+            logger.warning("compute_redirects(): empty page name: %s", source)
             continue
-        # add a new dict to redirect_map if the page has not been seen before
-        if pagename not in computed_redirects:
-            computed_redirects[pagename] = dict()
         # if the target page has the same prefix as html_baseurl, remove the prefix so intra-site redirects work
-        target = redirects_option[source].removeprefix(html_baseurl)
+        target = source_target.removeprefix(html_baseurl)
         # if the target is the empty string then the redirect is invalid. warn the user and continue on
         if target == "":
-            logger.warning("compute_redirects(): empty target for source %s" % source)
+            logger.warning("compute_redirects(): empty target for source %s", source)
             continue
         # if url_path_prefix is defined and the target path starts with '/', prepend it to the target path.
-        if url_path_prefix != "" and target.startswith("/"):
+        if has_url_path_prefix and target.startswith("/"):
             target = url_path_prefix + target
         # if there's no fragment then we're redirecting to the "default page", which is
-        # the `pagename` without any fragment.
+        # the `pagename` without any fragment. otherwise, redirect the fragment to the desired page.
+        # the page's dict is only added once it has a valid redirect, so no page is left empty.
         if fragment == "":
-            computed_redirects[pagename][DEFAULT_PAGE] = target
-            continue
-        # redirect the fragment to the desired page
-        computed_redirects[pagename][fragment] = target
-    # remove empty keys from the map
-    empty_keys: List[str] = list()
-    for key in computed_redirects.keys():
-        if len(computed_redirects[key]) == 0:
-            empty_keys.append(key)
-    for key in empty_keys:
-        computed_redirects.pop(key)
+            fragment = DEFAULT_PAGE
+        computed_redirects.setdefault(pagename, dict())[fragment] = target
     return computed_redirects
 
 
 def build_js_object(pagemap: Dict[str, str]) -> str:
-    jsobject = "const " + CTX_FRAGMENT_REDIRECTS + " = Object.freeze({"
-    for frag in pagemap.keys():
-        jsobject += '"' + frag + '":"' + pagemap[frag] + '",'
-    jsobject = jsobject.rstrip(",") + "});"
-    return jsobject
+    # JSON-encode the whole map in one call so quotes and backslashes are escaped safely
+    return (
+        "const "
+        + CTX_FRAGMENT_REDIRECTS
+        + " = Object.freeze("
+        + json.dumps(pagemap, separators=(",", ":"))
+        + ");"
+    )
 
 
 def old_status_iterator(
@@ -385,12 +416,21 @@ def status_iterator(
         yield from old_status_iterator(mapping, summary, color)
         return
     line_count = 0
+    last_percent = -1
+    last_update = 0.0
     summary = bold(summary)
     for item in mapping.items():
         line_count += 1
+        percent = 100 * line_count // length
+        # only redraw the status line when the percentage changes, the update interval has passed,
+        # or this is the final item
+        if not verbosity and percent == last_percent and line_count != length:
+            if monotonic() - last_update < STATUS_UPDATE_INTERVAL:
+                yield item
+                continue
         s = "%s[%3d%%] %s" % (
             summary,
-            100 * line_count / length,
+            percent,
             colorize(color, item[0]),
         )
         if verbosity:
@@ -398,18 +438,20 @@ def status_iterator(
         else:
             s = term_width_line(s)
         logger.info(s, nonl=True)
+        last_percent = percent
+        last_update = monotonic()
         yield item
     if line_count > 0:
         logger.info("")
 
 
 def old_list_status_iterator(
-    mapping: List[str], summary: str, color: str = "darkgreen"
+    mapping: Iterable[str], summary: str, color: str = "darkgreen"
 ) -> str:
     """
     Displays the status of iterating through a List of strings. Adapted from the Sphinx sources.
 
-    :param mapping: The List to iterate through
+    :param mapping: The List or other iterable to iterate through
     :param summary: A description of the action or operation
     :param color: The color of the status text; defaults to `darkgreen`
     :return: A tuple containing the next value from the List
@@ -427,7 +469,7 @@ def old_list_status_iterator(
 
 
 def list_status_iterator(
-    mapping: List[str],
+    mapping: Iterable[str],
     summary: str,
     color: str = "darkgreen",
     length: int = 0,
@@ -437,7 +479,7 @@ def list_status_iterator(
     Displays the status of iterating through a List of strings. Adapted from the Sphinx sources.
     Status includes percent of records in the List that have been iterated through.
 
-    :param mapping: The List to iterate through
+    :param mapping: The List or other iterable to iterate through
     :param summary: A description of the action or operation
     :param color:  The color of the status text; defaults to `darkgreen`
     :param length: The number of records in the List
@@ -448,12 +490,21 @@ def list_status_iterator(
         yield from old_list_status_iterator(mapping, summary, color)
         return
     line_count = 0
+    last_percent = -1
+    last_update = 0.0
     summary = bold(summary)
     for item in mapping:
         line_count += 1
+        percent = 100 * line_count // length
+        # only redraw the status line when the percentage changes, the update interval has passed,
+        # or this is the final item
+        if not verbosity and percent == last_percent and line_count != length:
+            if monotonic() - last_update < STATUS_UPDATE_INTERVAL:
+                yield item
+                continue
         s = "%s[%3d%%] %s" % (
             summary,
-            100 * line_count / length,
+            percent,
             colorize(color, item),
         )
         if verbosity:
@@ -461,6 +512,8 @@ def list_status_iterator(
         else:
             s = term_width_line(s)
         logger.info(s, nonl=True)
+        last_percent = percent
+        last_update = monotonic()
         yield item
     if line_count > 0:
         logger.info("")
@@ -0,0 +1,34 @@
+from sphinx.application import Sphinx
+from sphinx.util.logging import LEVEL_NAMES, VERBOSITY_MAP
+
+
+def log_enabled(app: Sphinx, level: int) -> bool:
+    """
+    Determine if a log message at the specified level would be emitted.
+    Sphinx sets its loggers to DEBUG and filters by verbosity in the handlers, so `isEnabledFor()` is always true.
+
+    :param app: The Sphinx Application instance
+    :param level: The log level to check
+    :return: True if messages at the specified level will be written, False otherwise
+    """
+    return level >= VERBOSITY_MAP[app.verbosity]
+
+
+def verbose_enabled(app: Sphinx) -> bool:
+    """
+    Determine if verbose log messages would be emitted.
+
+    :param app: The Sphinx Application instance
+    :return: True if verbose messages will be written, False otherwise
+    """
+    return log_enabled(app, LEVEL_NAMES["VERBOSE"])
+
+
+def debug_enabled(app: Sphinx) -> bool:
+    """
+    Determine if debug log messages would be emitted.
+
+    :param app: The Sphinx Application instance
+    :return: True if debug messages will be written, False otherwise
+    """
+    return log_enabled(app, LEVEL_NAMES["DEBUG"])
@@ -1,71 +1,95 @@
-from typing import Dict, List, Any
+from typing import Dict, List, Tuple
 from docutils import nodes
 from sphinx.util import logging
 
 from .node import SEORedirectNode
 
+# Sphinx logger
+logger = logging.getLogger(__name__)
 
-class DoctreeWalker(nodes.SparseNodeVisitor):
-    logger: logging.SphinxLoggerAdapter
-    _section_redirects: Dict[str, List[str]]
-    _root_section: str
 
-    def __init__(self, document: nodes.document):
-        super().__init__(document)
-        self.logger = logging.getLogger("DoctreeWalker")
-        self._section_redirects = dict()
-        self._root_section = ""
-        self.find_root_section(document)
+def get_section_id(section: nodes.Element) -> str:
+    """
+    Get the id of a section. docutils initializes the `ids` attribute on every Element, so it can be read directly.
 
-    def find_root_section(self, document: nodes.document):
-        for child in document.children:
-            if isinstance(child, nodes.section):
-                if "ids" in child.attributes:
-                    node_ids: List[str] = child.attributes["ids"]
-                    if len(node_ids) > 0:
-                        self._root_section = node_ids[0]
-                        self.logger.debug(
-                            "find_root_section: found root section: %s"
-                            % self._root_section
-                        )
-                        break
+    :param section: The section node
+    :return: The first id of the section, or the empty string if it has none
+    """
+    ids: List[str] = section["ids"]
+    return ids[0] if ids else ""
 
-    def visit_section(self, node: nodes.section):
-        # get section id
-        section_id = ""
-        if "ids" in node.attributes:
-            ids_attr: List[str] = node.attributes["ids"]
-            if len(ids_attr) > 0:
-                section_id = ids_attr[0]
-                if section_id != "":
-                    self.logger.debug(
-                        "visit_section(): visiting section %s" % section_id
+
+def find_root_section(document: nodes.document, debug: bool = False) -> str:
+    """
+    Find the id of the first top-level section in the document.
+
+    :param document: The document to search
+    :param debug: Flag which enables debug log messages
+    :return: The id of the root section, or the empty string if there isn't one
+    """
+    for child in document.children:
+        if isinstance(child, nodes.section):
+            root_section = get_section_id(child)
+            if root_section != "":
+                if debug:
+                    logger.debug(
+                        "find_root_section(): found root section: %s", root_section
                     )
-        # look for SEORedirectNode nodes; remove them when we're done
-        redirects: List[str] = list()
-        for child in node.children:
-            if isinstance(child, SEORedirectNode):
-                redirects.extend(child.redirect_list)
-                self.logger.debug(
-                    "visit_section(): child node redirects: %s"
-                    % ",".join(child.redirect_list)
-                )
-                child.replace_self([])
-                break
-        if len(redirects) > 0 and section_id != "":
-            self.logger.debug(
-                "visit_section(): adding %d redirects to section %s"
-                % (len(redirects), section_id)
+                return root_section
+    return ""
+
+
+def collect_section_redirects(
+    document: nodes.document, debug: bool = False
+) -> Dict[str, List[str]]:
+    """
+    Collect the redirects from each SEORedirectNode in the document and remove the nodes from the doctree.
+
+    :param document: The document to search
+    :param debug: Flag which enables debug log messages
+    :return: A dict of section ids to the list of unique redirects for that section
+    """
+    # a dict with no values is used as an ordered set so duplicate redirects are only kept once
+    section_redirects: Dict[str, Dict[str, None]] = dict()
+    # collect the SEORedirectNode nodes up front since we remove them from the doctree as we go
+    for redirect_node in list(document.findall(SEORedirectNode)):
+        # get the id of the section containing the node; the directive may be nested inside other body elements
+        section_id = ""
+        parent = redirect_node.parent
+        while parent is not None and not isinstance(parent, nodes.section):
+            parent = parent.parent
+        if parent is not None:
+            section_id = get_section_id(parent)
+        redirect_node.replace_self([])
+        if len(redirect_node.redirect_list) == 0 or section_id == "":
+            continue
+        if debug:
+            logger.debug(
+                "collect_section_redirects(): adding redirects to section %s: %s",
+                section_id,
+                ",".join(redirect_node.redirect_list),
             )
-            self._section_redirects[section_id] = redirects
+        section_redirects.setdefault(section_id, dict()).update(
+            dict.fromkeys(redirect_node.redirect_list)
+        )
+    return {
+        section_id: list(redirects)
+        for section_id, redirects in section_redirects.items()
+    }
 
-    def unknown_visit(self, node: nodes.Node) -> Any:
-        raise nodes.SkipNode
 
-    @property
-    def section_redirects(self) -> Dict[str, List[str]]:
-        return self._section_redirects
+def collect_redirects(
+    document: nodes.document, debug: bool = False
+) -> Tuple[str, Dict[str, List[str]]]:
+    """
+    Collect the redirects from the document and find its root section.
 
-    @property
-    def root_section(self) -> str:
-        return self._root_section
+    :param document: The document to search
+    :param debug: Flag which enables debug log messages
+    :return: A tuple of the root section id and the dict of section ids to redirects. The root section is only
+             searched for when the document has redirects; otherwise it is the empty string.
+    """
+    section_redirects = collect_section_redirects(document, debug)
+    if len(section_redirects) == 0:
+        return "", section_redirects
+    return find_root_section(document, debug), section_redirects
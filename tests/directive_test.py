@@ -0,0 +1,43 @@
+from sphinx.testing.restructuredtext import parse
+from sphinx_seo_redirect import setup as ext_setup
+from sphinx_seo_redirect.node import SEORedirectNode
+from sphinx_seo_redirect.sphinx import builder_inited as ext_builder_inited
+
+
+class TestSEORedirectDirective:
+    def test_nominal(self, app):
+        ext_setup(app)
+        ext_builder_inited(app)
+        text = (
+            ".. seo-redirect:: old/page1,old/page2#frag1\n"
+            "\n"
+            "  old2/page3#frag2\n"
+            "  old2/page4\n"
+        )
+        doctree = parse(app, text, "foo")
+        redirect_nodes = list(doctree.findall(SEORedirectNode))
+        assert len(redirect_nodes) == 1
+        assert redirect_nodes[0].redirect_list == [
+            "old/page1",
+            "old/page2#frag1",
+            "old2/page3#frag2",
+            "old2/page4",
+        ]
+
+    def test_content_only(self, app):
+        ext_setup(app)
+        ext_builder_inited(app)
+        text = ".. seo-redirect::\n\n  old/page1\n\n  old/page2\n"
+        doctree = parse(app, text, "foo")
+        redirect_nodes = list(doctree.findall(SEORedirectNode))
+        assert len(redirect_nodes) == 1
+        assert redirect_nodes[0].redirect_list == ["old/page1", "old/page2"]
+
+    def test_argument_only(self, app):
+        ext_setup(app)
+        ext_builder_inited(app)
+        text = ".. seo-redirect:: old/page1,,old/page2#frag1\n"
+        doctree = parse(app, text, "foo")
+        redirect_nodes = list(doctree.findall(SEORedirectNode))
+        assert len(redirect_nodes) == 1
+        assert redirect_nodes[0].redirect_list == ["old/page1", "old/page2#frag1"]
@@ -0,0 +1,19 @@
+from sphinx_seo_redirect.node import SEORedirectNode
+
+
+class TestSEORedirectNode:
+    def test_nominal(self):
+        redirects = ["old/page1", "old/page2#frag1"]
+        node = SEORedirectNode(redirects)
+        assert node.redirect_list == ["old/page1", "old/page2#frag1"]
+        assert node.astext() == "old/page1,old/page2#frag1"
+
+    def test_empty_redirects(self):
+        node = SEORedirectNode(["old/page1", "", "old/page2", ""])
+        assert node.redirect_list == ["old/page1", "old/page2"]
+
+    def test_copies_redirects(self):
+        redirects = ["old/page1"]
+        node = SEORedirectNode(redirects)
+        redirects.append("old/page2")
+        assert node.redirect_list == ["old/page1"]
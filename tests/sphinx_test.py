@@ -1,20 +1,40 @@
 from sphinx_seo_redirect.sphinx import (
     builder_inited as ext_builder_inited,
+    env_purge_doc as ext_env_purge_doc,
+    env_merge_info as ext_env_merge_info,
+    doctree_resolved as ext_doctree_resolved,
+    build_finished as ext_build_finished,
     env_updated as ext_env_updated,
     html_page_context as ext_html_page_context,
     html_collect_pages as ext_html_collect_pages,
     compute_redirects as ext_compute_redirects,
+    compute_doctree_redirects as ext_compute_doctree_redirects,
     build_js_object as ext_build_js_object,
+    list_status_iterator as ext_list_status_iterator,
+    CONFIG_HTML_BASEURL,
     CONFIG_OPTION_REDIRECTS,
+    CONFIG_URL_PATH_PREFIX,
+    CONFIG_WRITE_EXTENSIONLESS_PAGES,
     CTX_HAS_FRAGMENT_REDIRECTS,
     CTX_FRAGMENT_REDIRECTS,
     DEFAULT_PAGE,
     ENV_COMPUTED_REDIRECTS,
     ENV_INTRA_PAGE_FRAGMENT_PAGES,
     ENV_DOCTREE_REDIRECTS,
+    ENV_EXTENSIONLESS_PAGES,
 )
 from sphinx_seo_redirect import setup as ext_setup
-from typing import Dict, List
+from sphinx_seo_redirect.node import SEORedirectNode
+from docutils import nodes
+from docutils.utils import new_document
+from pathlib import Path
+from sphinx.util.console import strip_colors
+from typing import Dict, List, Set
+
+
+# stands in for the BuildEnvironment of a parallel reader worker
+class OtherEnv:
+    pass
 
 
 class TestBuilderInited:
@@ -25,7 +45,40 @@ class TestBuilderInited:
         assert hasattr(app.env, ENV_DOCTREE_REDIRECTS)
 
 
-# TODO: env_purge_doc, env_merge_info
+class TestEnvPurgeDoc:
+    def test_nominal(self, app):
+        ext_setup(app)
+        ext_builder_inited(app)
+        getattr(app.env, ENV_DOCTREE_REDIRECTS)["foo"] = {"bar": ["baz"]}
+        ext_env_purge_doc(app, app.env, "foo")
+        assert "foo" not in getattr(app.env, ENV_DOCTREE_REDIRECTS)
+
+
+class TestEnvMergeInfo:
+    def test_nominal(self, app):
+        ext_setup(app)
+        ext_builder_inited(app)
+        other = OtherEnv()
+        setattr(other, ENV_DOCTREE_REDIRECTS, {"foo": {"bar": ["baz"]}})
+        ext_env_merge_info(app, app.env, ["foo", "narf"], other)
+        assert getattr(app.env, ENV_DOCTREE_REDIRECTS) == {"foo": {"bar": ["baz"]}}
+
+    def test_existing_redirects(self, app):
+        ext_setup(app)
+        ext_builder_inited(app)
+        setattr(app.env, ENV_DOCTREE_REDIRECTS, {"qux": {"bar": ["fnord"]}})
+
+        other = OtherEnv()
+        setattr(
+            other,
+            ENV_DOCTREE_REDIRECTS,
+            {"foo": {"bar": ["baz"]}, "qux": {"bar": ["stale"]}},
+        )
+        ext_env_merge_info(app, app.env, ["foo", "narf"], other)
+        assert getattr(app.env, ENV_DOCTREE_REDIRECTS) == {
+            "foo": {"bar": ["baz"]},
+            "qux": {"bar": ["fnord"]},
+        }
 
 
 class TestEnvUpdated:
@@ -36,11 +89,8 @@ class TestEnvUpdated:
         ext_builder_inited(app)
         ext_env_updated(app, app.env)
         assert hasattr(app.env, ENV_INTRA_PAGE_FRAGMENT_PAGES)
-        intra_page_fragments: List[str] = getattr(
-            app.env, ENV_INTRA_PAGE_FRAGMENT_PAGES
-        )
-        assert len(intra_page_fragments) == 1
-        assert intra_page_fragments[0] == "foo"
+        intra_page_fragments: Set[str] = getattr(app.env, ENV_INTRA_PAGE_FRAGMENT_PAGES)
+        assert intra_page_fragments == {"foo"}
 
     def test_fragment_not_in_alldocs(self, app):
         ext_setup(app)
@@ -49,9 +99,7 @@ class TestEnvUpdated:
         ext_builder_inited(app)
         ext_env_updated(app, app.env)
         assert hasattr(app.env, ENV_INTRA_PAGE_FRAGMENT_PAGES)
-        intra_page_fragments: List[str] = getattr(
-            app.env, ENV_INTRA_PAGE_FRAGMENT_PAGES
-        )
+        intra_page_fragments: Set[str] = getattr(app.env, ENV_INTRA_PAGE_FRAGMENT_PAGES)
         assert len(intra_page_fragments) == 0
 
     def test_no_computed_redirects(self, app):
@@ -61,9 +109,7 @@ class TestEnvUpdated:
         ext_builder_inited(app)
         ext_env_updated(app, app.env)
         assert hasattr(app.env, ENV_INTRA_PAGE_FRAGMENT_PAGES)
-        intra_page_fragments: List[str] = getattr(
-            app.env, ENV_INTRA_PAGE_FRAGMENT_PAGES
-        )
+        intra_page_fragments: Set[str] = getattr(app.env, ENV_INTRA_PAGE_FRAGMENT_PAGES)
         assert len(intra_page_fragments) == 0
 
 
@@ -109,7 +155,7 @@ class TestHtmlCollectPages:
         ext_env_updated(app, app.env)
         ctx = dict()
         ext_html_page_context(app, "foo", "template.html", ctx, dict())
-        collected_pages = ext_html_collect_pages(app)
+        collected_pages = list(ext_html_collect_pages(app))
         assert len(collected_pages) == 1
         assert collected_pages[0] == expected_collected_page
 
@@ -133,12 +179,126 @@ class TestHtmlCollectPages:
         ext_env_updated(app, app.env)
         ctx = dict()
         ext_html_page_context(app, "foo", "template.html", ctx, dict())
-        collected_pages = ext_html_collect_pages(app)
+        collected_pages = list(ext_html_collect_pages(app))
         assert len(collected_pages) == 1
         assert collected_pages[0] == expected_collected_page
 
+    def test_single_fragment_redirect(self, app):
+        expected_jsobject = (
+            "const "
+            + CTX_FRAGMENT_REDIRECTS
+            + ' = Object.freeze({"frag1":"bar#frag2","-":"bar#frag2"});'
+        )
+        expected_collected_page = (
+            "foo",
+            {CTX_FRAGMENT_REDIRECTS: expected_jsobject},
+            "redirect.html",
+        )
+        ext_setup(app)
+        app.env.all_docs["bar"] = 0
+        app.config[CONFIG_OPTION_REDIRECTS] = dict({"foo#frag1": "bar#frag2"})
+        ext_builder_inited(app)
+        ext_env_updated(app, app.env)
+        collected_pages = list(ext_html_collect_pages(app))
+        assert len(collected_pages) == 1
+        assert collected_pages[0] == expected_collected_page
+
+    def test_extensionless_pages(self, app):
+        ext_setup(app)
+        app.env.all_docs["bar"] = 0
+        app.config[CONFIG_WRITE_EXTENSIONLESS_PAGES] = True
+        app.config[CONFIG_OPTION_REDIRECTS] = dict(
+            {"foo": "bar", "baz#frag1": "bar#frag2", "bar#frag3": "bar#frag4"}
+        )
+        ext_builder_inited(app)
+        ext_env_updated(app, app.env)
+        collected_pages = list(ext_html_collect_pages(app))
+        assert [page[0] for page in collected_pages] == ["foo", "baz"]
+        assert getattr(app.env, ENV_EXTENSIONLESS_PAGES) == ["foo", "baz"]
 
-# TODO: doctree_resolved, build_finished. compute_doctree_redirects
+
+class TestDoctreeResolved:
+    def test_no_redirect_directive(self, app):
+        ext_setup(app)
+        ext_builder_inited(app)
+        ext_doctree_resolved(app, new_document("foo"), "foo")
+        doctree_redirects: Dict[str, Dict[str, List[str]]] = getattr(
+            app.env, ENV_DOCTREE_REDIRECTS
+        )
+        assert len(doctree_redirects) == 0
+
+    def test_nominal(self, app):
+        ext_setup(app)
+        ext_builder_inited(app)
+        document = new_document("foo")
+        root_section = nodes.section(ids=["root"])
+        root_section += SEORedirectNode(["old/foo"])
+        child_section = nodes.section(ids=["child"])
+        child_section += SEORedirectNode(["old/bar#baz"])
+        root_section += child_section
+        document += root_section
+        ext_doctree_resolved(app, document, "foo")
+        doctree_redirects: Dict[str, Dict[str, List[str]]] = getattr(
+            app.env, ENV_DOCTREE_REDIRECTS
+        )
+        assert doctree_redirects == {
+            "foo": {DEFAULT_PAGE: ["old/foo"], "child": ["old/bar#baz"]}
+        }
+
+
+class TestBuildFinished:
+    def test_nominal(self, app):
+        ext_setup(app)
+        app.config[CONFIG_WRITE_EXTENSIONLESS_PAGES] = True
+        outdir = Path(app.outdir)
+        outdir.mkdir(parents=True, exist_ok=True)
+        outdir.joinpath("foo.html").write_text("foo")
+        outdir.joinpath("bar.html").write_text("bar")
+        outdir.joinpath("baz").mkdir(exist_ok=True)
+        setattr(app.env, ENV_EXTENSIONLESS_PAGES, ["foo", "bar", "baz"])
+        ext_build_finished(app, None)
+        assert outdir.joinpath("foo").read_text() == "foo"
+        assert outdir.joinpath("bar").read_text() == "bar"
+        assert outdir.joinpath("baz").is_dir()
+
+
+class TestComputeDoctreeRedirects:
+    def test_nominal(self, app):
+        ext_setup(app)
+        ext_builder_inited(app)
+        app.config[CONFIG_HTML_BASEURL] = "https://example.com/"
+        app.config[CONFIG_URL_PATH_PREFIX] = "docs/"
+        setattr(
+            app.env,
+            ENV_DOCTREE_REDIRECTS,
+            {
+                "foo": {DEFAULT_PAGE: ["old/foo"], "bar": ["old/bar", "old/baz#qux"]},
+            },
+        )
+        expected_doctree_redirects: Dict[str, str] = {
+            "old/foo": "https://example.com/docs/foo",
+            "old/bar": "https://example.com/docs/foo#bar",
+            "old/baz#qux": "https://example.com/docs/foo#bar",
+        }
+        actual_doctree_redirects = ext_compute_doctree_redirects(app)
+        assert actual_doctree_redirects == expected_doctree_redirects
+
+    def test_no_path_prefix(self, app):
+        ext_setup(app)
+        ext_builder_inited(app)
+        app.config[CONFIG_HTML_BASEURL] = "https://example.com/"
+        app.config[CONFIG_URL_PATH_PREFIX] = ""
+        setattr(
+            app.env,
+            ENV_DOCTREE_REDIRECTS,
+            {"foo": {DEFAULT_PAGE: ["old/foo"], "bar": ["old/bar"]}},
+        )
+        expected_doctree_redirects: Dict[str, str] = {
+            "old/foo": "https://example.com/foo",
+            "old/bar": "https://example.com/foo#bar",
+        }
+        actual_doctree_redirects = ext_compute_doctree_redirects(app)
+        assert actual_doctree_redirects == expected_doctree_redirects
 
 
 class TestComputeRedirects:
@@ -166,6 +326,41 @@ class TestComputeRedirects:
         actual_computed_redirects = ext_compute_redirects(app, redirects)
         assert actual_computed_redirects == expected_computed_redirects
 
+    def test_html_suffixes(self, app):
+        ext_setup(app)
+        redirects: Dict[str, str] = {
+            "foo.html": "bar",
+            "baz.html#frag1.html": "bar#frag1",
+            "qux#": "quux",
+            "narf.html.html": "zot",
+        }
+        expected_computed_redirects: Dict[str, Dict[str, str]] = {
+            "foo": {DEFAULT_PAGE: "bar"},
+            "baz": {"frag1": "bar#frag1"},
+            "qux": {DEFAULT_PAGE: "quux"},
+            "narf.html": {DEFAULT_PAGE: "zot"},
+        }
+        actual_computed_redirects = ext_compute_redirects(app, redirects)
+        assert actual_computed_redirects == expected_computed_redirects
+
+    def test_baseurl_and_path_prefix(self, app):
+        ext_setup(app)
+        app.config[CONFIG_HTML_BASEURL] = "https://example.com/"
+        app.config[CONFIG_URL_PATH_PREFIX] = "/docs/"
+        redirects: Dict[str, str] = {
+            "foo": "https://example.com/bar",
+            "baz": "/qux",
+            "narf": "https://elsewhere.example.com/zot",
+            "fnord": "https://example.com",
+        }
+        expected_computed_redirects: Dict[str, Dict[str, str]] = {
+            "foo": {DEFAULT_PAGE: "/docs/bar"},
+            "baz": {DEFAULT_PAGE: "/docs/qux"},
+            "narf": {DEFAULT_PAGE: "https://elsewhere.example.com/zot"},
+        }
+        actual_computed_redirects = ext_compute_redirects(app, redirects)
+        assert actual_computed_redirects == expected_computed_redirects
+
 
 class TestBuildJSObject:
     def test_nominal(self, app):
@@ -181,3 +376,27 @@ class TestBuildJSObject:
         )
         actual_js_object = ext_build_js_object(pagemap)
         assert actual_js_object == expected_js_object
+
+    def test_escaping(self, app):
+        pagemap: Dict[str, str] = {
+            'frag"1': 'foo\\bar.html#"frag2"',
+        }
+        expected_js_object = (
+            "const "
+            + CTX_FRAGMENT_REDIRECTS
+            + ' = Object.freeze({"frag\\"1":"foo\\\\bar.html#\\"frag2\\""});'
+        )
+        actual_js_object = ext_build_js_object(pagemap)
+        assert actual_js_object == expected_js_object
+
+
+class TestListStatusIterator:
+    def test_nominal(self, app, status):
+        items: List[str] = ["page%d" % idx for idx in range(1000)]
+        actual_items = list(
+            ext_list_status_iterator(items, "testing... ", length=len(items))
+        )
+        assert actual_items == items
+        output = strip_colors(status.getvalue())
+        assert "[100%] page999" in output
+        assert output.count("page") < len(items)
@@ -0,0 +1,24 @@
+from sphinx_seo_redirect.util import (
+    debug_enabled as ext_debug_enabled,
+    verbose_enabled as ext_verbose_enabled,
+)
+
+
+class TestVerboseEnabled:
+    def test_nominal(self, app):
+        app.verbosity = 1
+        assert ext_verbose_enabled(app)
+
+    def test_not_verbose(self, app):
+        app.verbosity = 0
+        assert not ext_verbose_enabled(app)
+
+
+class TestDebugEnabled:
+    def test_nominal(self, app):
+        app.verbosity = 2
+        assert ext_debug_enabled(app)
+
+    def test_verbose_only(self, app):
+        app.verbosity = 1
+        assert not ext_debug_enabled(app)
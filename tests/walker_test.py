@@ -0,0 +1,95 @@
+from docutils import nodes
+from docutils.utils import new_document
+from sphinx_seo_redirect.node import SEORedirectNode
+from sphinx_seo_redirect.walker import (
+    find_root_section as ext_find_root_section,
+    collect_section_redirects as ext_collect_section_redirects,
+    collect_redirects as ext_collect_redirects,
+)
+
+
+class TestFindRootSection:
+    def test_nominal(self):
+        document = new_document("test")
+        root_section = nodes.section(ids=["root"])
+        root_section += nodes.section(ids=["child"])
+        document += root_section
+        assert ext_find_root_section(document) == "root"
+
+    def test_no_sections(self):
+        document = new_document("test")
+        document += nodes.paragraph(text="foo")
+        assert ext_find_root_section(document) == ""
+
+
+class TestCollectSectionRedirects:
+    def test_nominal(self):
+        document = new_document("test")
+        root_section = nodes.section(ids=["root"])
+        child_section = nodes.section(ids=["child"])
+        child_section += SEORedirectNode(["old/page1", "old/page2#frag1"])
+        root_section += child_section
+        document += root_section
+        section_redirects = ext_collect_section_redirects(document)
+        assert section_redirects == {"child": ["old/page1", "old/page2#frag1"]}
+        assert len(list(document.findall(SEORedirectNode))) == 0
+
+    def test_multiple_nodes_in_section(self):
+        document = new_document("test")
+        section = nodes.section(ids=["root"])
+        section += SEORedirectNode(["old/page1"])
+        section += SEORedirectNode(["old/page2"])
+        document += section
+        section_redirects = ext_collect_section_redirects(document)
+        assert section_redirects == {"root": ["old/page1", "old/page2"]}
+
+    def test_duplicate_redirects(self):
+        document = new_document("test")
+        section = nodes.section(ids=["root"])
+        section += SEORedirectNode(["old/page1", "old/page2", "old/page1"])
+        section += SEORedirectNode(["old/page2", "old/page3"])
+        document += section
+        section_redirects = ext_collect_section_redirects(document)
+        assert section_redirects == {"root": ["old/page1", "old/page2", "old/page3"]}
+
+    def test_node_nested_in_section(self):
+        document = new_document("test")
+        section = nodes.section(ids=["root"])
+        container = nodes.container()
+        container += SEORedirectNode(["old/page1"])
+        section += container
+        document += section
+        section_redirects = ext_collect_section_redirects(document)
+        assert section_redirects == {"root": ["old/page1"]}
+        assert len(list(document.findall(SEORedirectNode))) == 0
+
+    def test_node_outside_section(self):
+        document = new_document("test")
+        document += SEORedirectNode(["old/page1"])
+        section_redirects = ext_collect_section_redirects(document)
+        assert len(section_redirects) == 0
+        assert len(list(document.findall(SEORedirectNode))) == 0
+
+
+class TestCollectRedirects:
+    def test_nominal(self):
+        document = new_document("test")
+        root_section = nodes.section(ids=["root"])
+        root_section += SEORedirectNode(["old/page1"])
+        child_section = nodes.section(ids=["child"])
+        child_section += SEORedirectNode(["old/page2#frag1"])
+        root_section += child_section
+        document += root_section
+        root_section_id, section_redirects = ext_collect_redirects(document)
+        assert root_section_id == "root"
+        assert section_redirects == {
+            "root": ["old/page1"],
+            "child": ["old/page2#frag1"],
+        }
+
+    def test_no_redirects(self):
+        document = new_document("test")
+        document += nodes.section(ids=["root"])
+        root_section_id, section_redirects = ext_collect_redirects(document)
+        assert root_section_id == ""
+        assert len(section_redirects) == 0